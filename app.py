@@ -5,14 +5,17 @@ import io
 from flask import Flask, render_template, request, jsonify, make_response
 from tasks import process_file_task
 from processing.intelligence import calculate_match_score 
+from processing.validator import validate_upload, MAX_UPLOAD_BYTES
+import spool
 
 
 app = Flask(__name__)
 
 # Configuration
-UPLOAD_FOLDER = 'uploads'
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+UPLOAD_FOLDER = spool.SPOOL_ROOT
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# Multipart overhead allowed on top of MAX_UPLOAD_BYTES for /upload bodies
+UPLOAD_BODY_SLACK = 1024 * 1024
 
 @app.route('/')
 def index():
@@ -23,6 +26,17 @@ def upload_file():
     """
     Async Upload: Saves file -> Starts Task -> Returns ID
     """
+    # Backpressure: refuse new work while the spool is near its quota
+    if spool.is_under_pressure():
+        response = jsonify({"error": "Server busy, please retry shortly"})
+        response.headers["Retry-After"] = str(spool.SPOOL_RETRY_AFTER)
+        return response, 503
+
+    # Refuse oversized uploads before the body is parsed (only /upload is capped;
+    # /match-jd and /download-csv legitimately carry large JSON batches)
+    if request.content_length and request.content_length > MAX_UPLOAD_BYTES + UPLOAD_BODY_SLACK:
+        return jsonify({"error": "File is too large."}), 413
+
     if 'file' not in request.files:
         return jsonify({"error": "No file part"}), 400
     
@@ -32,17 +46,40 @@ def upload_file():
         return jsonify({"error": "No selected file"}), 400
         
     if file:
-        # Generate unique filename to avoid collisions
-        unique_filename = str(uuid.uuid4()) + "_" + file.filename
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        file.save(filepath)
+        # Reject empty, corrupt, encrypted or mislabelled files up front,
+        # before they cost disk space or a worker slot
+        file_info, error = validate_upload(file.stream, file.filename)
+        if error:
+            return jsonify({"error": error}), 422
+        
+        # Files from the same batch share a spool subdirectory. The server
+        # issues batch ids; an unknown or missing one starts a new batch.
+        batch_id = spool.resolve_batch(request.form.get('batch_id'))
+        
+        # Take the spool reference before the file exists, so the janitor
+        # never sees it unreferenced. The task drops it when it finishes.
+        task_id = str(uuid.uuid4())
+        spool.add_ref(batch_id, task_id)
+        filepath = None
         
         # --- START BACKGROUND TASK ---
         # We don't wait for this! We just trigger it.
-        task = process_file_task.delay(filepath)
+        # file_info (format, size, pages) travels with the task for cost estimates
+        try:
+            filepath = spool.acquire(file, batch_id)
+            task = process_file_task.apply_async(
+                args=[filepath], kwargs={"file_info": file_info}, task_id=task_id
+            )
+        except Exception:
+            # Never queued, so nobody else will release it
+            if filepath:
+                spool.release(filepath, task_id=task_id)
+            else:
+                spool.drop_ref(batch_id, task_id)
+            raise
         
         # Return the Task ID to the frontend
-        return jsonify({"task_id": task.id}), 202
+        return jsonify({"task_id": task.id, "batch_id": batch_id, "file_info": file_info}), 202
 
 @app.route('/status/<task_id>', methods=['GET'])
 def get_status(task_id):
@@ -123,19 +160,26 @@ def download_csv():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
-import shutil
-
 @app.route('/reset', methods=['POST'])
 def reset_session():
     """
-    Clears all uploaded files and resets the session.
+    Clears the caller's own (server-issued) batches and resets the session.
+    Batches with live task references and other users' batches are left
+    alone; without batch ids we only run an age-based janitor pass.
     """
     try:
-        # Delete the entire uploads folder and recreate it
-        if os.path.exists(UPLOAD_FOLDER):
-            shutil.rmtree(UPLOAD_FOLDER)
+        req = request.get_json(silent=True) or {}
+        batch_ids = req.get('batch_ids', [])
+        if not isinstance(batch_ids, list): batch_ids = []
+        
+        # Batches with tasks still running are kept; their tasks clean up
+        busy = [b for b in batch_ids if not spool.remove_batch(b) and spool.is_batch_id(b)]
+        
+        if not batch_ids:
+            spool.sweep(enforce_quota=False)
+        
         os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-        return jsonify({"status": "cleared"})
+        return jsonify({"status": "cleared", "kept_busy": busy})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
@@ -0,0 +1,632 @@
+"""
+Load test + capacity model for the Flask + Celery deployment.
+
+Drives /upload -> /status -> /match-jd -> /download-csv at stepped Poisson
+arrival rates while sampling queue depth, worker/web CPU and RSS and Redis
+memory, then turns the run into pool-size recommendations.
+
+1. Start the stack locally with the stubbed LLM:
+       LLM_STUB=1 LLM_STUB_LATENCY=2 ./start.sh      (or: LLM_STUB=1 python run.py)
+2. Run the load:
+       python loadtest.py --rates 10,30,60 --step-duration 120 --target 100
+3. Re-model a saved run for another target without re-running it:
+       python loadtest.py --report-only loadtest_results.json --target 300
+
+psutil is optional (pip install psutil); without it CPU/RSS are not sampled.
+"""
+import os
+import io
+import json
+import math
+import time
+import uuid
+import random
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from time import perf_counter
+
+import redis
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+REDIS_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+
+# Celery's default queue list and the Redis transport's "reserved by a worker" hash
+QUEUE_KEY = 'celery'
+UNACKED_KEY = 'unacked'
+
+# The browser polls /status every 2s (see templates/index.html)
+CLIENT_POLL_SECONDS = 2.0
+
+# Size pools so that the measured load sits at this fraction of capacity
+TARGET_UTILIZATION = 0.7
+
+JD_TEXT = "Looking for a Python developer with AWS, Docker and SQL experience."
+
+SAMPLE_RESUME_LINES = [
+    "Jane Doe",
+    "jane.doe@example.com  +1 555 010 2030",
+    "Summary: Backend engineer with 6 years of experience.",
+    "Skills: Python, Flask, SQL, AWS, Docker, React",
+    "Experience: Senior Engineer at Example Corp (2019 - present)",
+    "Built data pipelines and REST APIs serving 2M requests/day.",
+    "Education: BSc Computer Science, Example University",
+]
+
+
+# --- TEST DATA ---
+
+def build_sample_pdf(lines=SAMPLE_RESUME_LINES):
+    """
+    Builds a one-page text PDF by hand, so the harness needs no PDF library.
+    """
+    text_ops = " ".join(f"({line}) '" for line in lines)
+    content = f"BT /F1 11 Tf 72 740 Td 16 TL {text_ops} ET".encode('latin-1')
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length " + str(len(content)).encode() + b" >>\nstream\n" + content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    xref_at = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+              f"startxref\n{xref_at}\n%%EOF\n".encode())
+    return out.getvalue()
+
+def load_files(directory):
+    """
+    Returns [(file_name, bytes)] to upload: real resumes from a directory,
+    or the generated sample PDF.
+    """
+    if not directory:
+        return [("sample_resume.pdf", build_sample_pdf())]
+
+    files = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                files.append((name, f.read()))
+    if not files:
+        raise SystemExit(f"No files found in {directory}")
+    return files
+
+
+# --- HTTP ---
+
+def http(base_url, method, path, body=None, headers=None, timeout=60):
+    """
+    Returns (status, headers, body, seconds). HTTP errors are returned,
+    connection errors raise.
+    """
+    req = urllib.request.Request(base_url + path, data=body, method=method, headers=headers or {})
+    start = perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            status, resp_headers, data = resp.status, resp.headers, resp.read()
+    except urllib.error.HTTPError as e:
+        status, resp_headers, data = e.code, e.headers, e.read()
+    return status, resp_headers, data, perf_counter() - start
+
+def post_json(base_url, path, payload):
+    return http(base_url, 'POST', path, json.dumps(payload).encode(),
+                {'Content-Type': 'application/json'})
+
+def post_file(base_url, file_name, content, batch_id=None):
+    boundary = uuid.uuid4().hex
+    batch_field = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"batch_id\"\r\n\r\n"
+                   f"{batch_id}\r\n") if batch_id else ""
+    body = (
+        batch_field +
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{file_name}\"\r\n"
+        f"Content-Type: application/octet-stream\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return http(base_url, 'POST', '/upload', body,
+                {'Content-Type': f'multipart/form-data; boundary={boundary}'})
+
+
+# --- ONE FILE'S JOURNEY ---
+
+def run_journey(base_url, file_name, content, batch, poll_interval, task_timeout):
+    """
+    Uploads one file and follows it through the same calls the UI makes.
+    batch is a shared {"id": ...} dict: like the UI, every file of a step
+    reuses the batch id the server issued to the first upload.
+    Queue wait and processing time come from the worker-side timestamps
+    process_file_task puts in its result, so they don't depend on
+    poll_interval. Failed tasks (no result) fall back to the first
+    STARTED status seen while polling.
+    """
+    record = {"file_name": file_name, "submitted_at": time.time(), "outcome": None,
+              "upload_s": None, "queue_wait_s": None, "processing_s": None,
+              "end_to_end_s": None, "finished_at": None, "timing_source": None,
+              "status_calls": 0, "status_s": [],
+              "match_s": None, "csv_s": None}
+    try:
+        status, headers, data, elapsed = post_file(base_url, file_name, content, batch.get("id"))
+        record["upload_s"] = elapsed
+        if status == 503:
+            record["outcome"] = "rejected_busy"
+            return record
+        if status != 202:
+            record["outcome"] = f"upload_{status}"
+            return record
+
+        upload = json.loads(data)
+        task_id = upload["task_id"]
+        batch.setdefault("id", upload.get("batch_id"))
+        enqueued = time.time()
+        started = None
+        result = None
+
+        while time.time() - enqueued < task_timeout:
+            time.sleep(poll_interval)
+            status, _, data, elapsed = http(base_url, 'GET', f'/status/{task_id}')
+            record["status_calls"] += 1
+            record["status_s"].append(elapsed)
+            state = json.loads(data).get("state")
+            if state == "STARTED" and started is None:
+                started = time.time()
+            elif state in ("SUCCESS", "FAILURE"):
+                result = json.loads(data).get("result") or {}
+                timings = result.get("timings") if isinstance(result, dict) else None
+                if timings:
+                    started, finished = timings["started_at"], timings["finished_at"]
+                    record["timing_source"] = "worker"
+                else:
+                    finished = time.time()
+                    started = started or finished
+                    record["timing_source"] = "poll"
+                record["queue_wait_s"] = max(0.0, started - enqueued)
+                record["processing_s"] = finished - started
+                record["finished_at"] = finished
+                # What the user waits for, including the last poll gap
+                record["end_to_end_s"] = time.time() - record["submitted_at"]
+                if state == "FAILURE":
+                    record["outcome"] = "task_failure"
+                    return record
+                break
+        else:
+            record["outcome"] = "timeout"
+            return record
+
+        resumes = [{"file_name": file_name, "data": result}]
+        status, _, data, elapsed = post_json(base_url, '/match-jd', {"resumes": resumes, "jd_text": JD_TEXT})
+        record["match_s"] = elapsed
+        if status == 200:
+            resumes = json.loads(data)
+
+        status, _, _, elapsed = post_json(base_url, '/download-csv', resumes)
+        record["csv_s"] = elapsed
+        record["outcome"] = "error_result" if "error" in result else "success"
+
+    except Exception as e:
+        record["outcome"] = f"client_error: {e}"
+    return record
+
+
+# --- SAMPLER ---
+
+def classify_process(cmdline):
+    joined = " ".join(cmdline or [])
+    if 'celery' in joined and 'worker' in joined:
+        return 'worker'
+    if 'gunicorn' in joined or joined.endswith('app.py'):
+        return 'web'
+    return None
+
+class Sampler(threading.Thread):
+    """
+    Background thread recording queue depth, Redis memory and per-role
+    CPU/RSS every `interval` seconds.
+    """
+    def __init__(self, redis_client, interval, state):
+        super().__init__(daemon=True)
+        self.redis = redis_client
+        self.interval = interval
+        self.state = state
+        self.samples = []
+        self.stop_event = threading.Event()
+        self.procs = {}
+
+    def _process_stats(self):
+        stats = {role: {"cpu_percent": 0.0, "rss_mb": 0.0, "uss_mb": 0.0, "processes": 0}
+                 for role in ('worker', 'web')}
+        if psutil is None:
+            return stats
+
+        seen = set()
+        for proc in psutil.process_iter(['pid', 'cmdline']):
+            role = classify_process(proc.info['cmdline'])
+            if not role:
+                continue
+            pid = proc.info['pid']
+            seen.add(pid)
+            # Reuse Process objects so cpu_percent() measures since the last sample
+            cached = self.procs.setdefault(pid, proc)
+            try:
+                stats[role]["cpu_percent"] += cached.cpu_percent(None)
+                rss = cached.memory_info().rss
+                try:
+                    # USS leaves out pages shared with the prefork parent
+                    uss = cached.memory_full_info().uss
+                except psutil.Error:
+                    uss = rss
+                stats[role]["rss_mb"] += rss / (1024 * 1024)
+                stats[role]["uss_mb"] += uss / (1024 * 1024)
+                stats[role]["processes"] += 1
+            except psutil.Error:
+                continue
+        self.procs = {pid: p for pid, p in self.procs.items() if pid in seen}
+        return stats
+
+    def sample(self):
+        row = {"t": time.time(), "step": self.state["step"], "in_flight": self.state["in_flight"]}
+        try:
+            row["queue_depth"] = self.redis.llen(QUEUE_KEY)
+            row["reserved"] = self.redis.hlen(UNACKED_KEY)
+            row["redis_used_mb"] = self.redis.info('memory')['used_memory'] / (1024 * 1024)
+        except redis.RedisError as e:
+            row["redis_error"] = str(e)
+        row.update(self._process_stats())
+        self.samples.append(row)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.sample()
+            self.stop_event.wait(self.interval)
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+        self.sample()
+
+
+# --- LOAD GENERATION ---
+
+def run_load(args):
+    files = load_files(args.files)
+    state = {"step": None, "in_flight": 0}
+    lock = threading.Lock()
+    journeys = []
+    threads = []
+
+    sampler = Sampler(redis.Redis.from_url(REDIS_URL), args.sample_interval, state)
+    if psutil is None:
+        print("⚠️  psutil not installed: worker/web CPU and RSS will not be sampled.")
+    sampler.start()
+
+    def worker(step, file_name, content, batch):
+        record = run_journey(args.base_url, file_name, content, batch,
+                             args.poll_interval, args.task_timeout)
+        record["step"] = step
+        with lock:
+            journeys.append(record)
+            state["in_flight"] -= 1
+
+    steps = []
+    for rate in args.rates:
+        print(f"🚀 Step: {rate:g} files/min for {args.step_duration}s")
+        state["step"] = rate
+        batch = {}
+        step_start = time.time()
+        next_arrival = step_start
+        while True:
+            # Poisson arrivals: exponential gaps with mean 60/rate seconds
+            next_arrival += random.expovariate(rate / 60.0)
+            if next_arrival - step_start >= args.step_duration:
+                break
+            time.sleep(max(0.0, next_arrival - time.time()))
+            file_name, content = random.choice(files)
+            with lock:
+                state["in_flight"] += 1
+            t = threading.Thread(target=worker, args=(rate, file_name, content, batch), daemon=True)
+            t.start()
+            threads.append(t)
+        time.sleep(max(0.0, step_start + args.step_duration - time.time()))
+        steps.append({"rate_fpm": rate, "start": step_start, "end": time.time()})
+
+    print(f"⏳ Draining in-flight files (up to {args.task_timeout}s)...")
+    state["step"] = "drain"
+    deadline = time.time() + args.task_timeout
+    for t in threads:
+        t.join(max(0.0, deadline - time.time()))
+    sampler.stop()
+
+    return {
+        "config": {
+            "base_url": args.base_url, "rates_fpm": args.rates, "step_duration_s": args.step_duration,
+            "poll_interval_s": args.poll_interval, "sample_interval_s": args.sample_interval,
+            "files": [name for name, _ in files], "cpu_count": os.cpu_count(),
+        },
+        "steps": steps,
+        "journeys": journeys,
+        "samples": sampler.samples,
+    }
+
+
+# --- CAPACITY MODEL ---
+
+def percentile(values, q):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+def mean(values):
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+def fmt(value, unit="s"):
+    return "-" if value is None else f"{value:.2f}{unit}"
+
+def finished_at(journey):
+    # Older result files only have the polled end-to-end time
+    return journey.get("finished_at") or journey["submitted_at"] + journey["end_to_end_s"]
+
+def summarize_step(step, journeys, samples):
+    mine = [j for j in journeys if j["step"] == step["rate_fpm"]]
+    ok = [j for j in mine if j["outcome"] == "success"]
+    # Throughput counts files that *finished* inside the step, whichever step
+    # submitted them; an overloaded step then shows fewer done than offered
+    done = [j for j in journeys if j["outcome"] == "success"
+            and step["start"] <= finished_at(j) <= step["end"]]
+    window = [s for s in samples if step["start"] <= s["t"] <= step["end"] and "queue_depth" in s]
+    duration = step["end"] - step["start"]
+
+    backlog = [s["queue_depth"] + s.get("reserved", 0) for s in window]
+    # Backlog growth over the step: > 0 means arrivals outpace the workers
+    slope = (backlog[-1] - backlog[0]) / duration if len(backlog) > 1 else 0.0
+
+    summary = {
+        "rate_fpm": step["rate_fpm"],
+        "submitted": len(mine),
+        "succeeded": len(ok),
+        "rejected_busy": sum(1 for j in mine if j["outcome"] == "rejected_busy"),
+        "failed": sum(1 for j in mine if j["outcome"] not in ("success", "rejected_busy")),
+        "throughput_fpm": len(done) / duration * 60 if duration else 0.0,
+        "max_backlog": max(backlog) if backlog else None,
+        "backlog_slope_per_s": slope,
+        "worker_cpu_percent": mean([s["worker"]["cpu_percent"] for s in window]),
+        "worker_rss_mb": max((s["worker"]["rss_mb"] for s in window), default=None),
+    }
+    for key in ("upload_s", "queue_wait_s", "processing_s", "end_to_end_s", "match_s", "csv_s"):
+        summary[key] = {"p50": percentile([j[key] for j in ok], 0.5),
+                        "p95": percentile([j[key] for j in ok], 0.95)}
+    summary["status_s"] = {"p50": percentile([x for j in ok for x in j["status_s"]], 0.5),
+                           "p95": percentile([x for j in ok for x in j["status_s"]], 0.95)}
+    # Completions must keep up with the arrivals actually generated (not the
+    # nominal rate, which Poisson noise misses) as well as the backlog staying
+    # flat. Arrivals are shifted by the unloaded end-to-end time (the fast
+    # 10th percentile of the whole run, not this step's, which grows with the
+    # very queue we are trying to detect), so files sent near the end of a
+    # step are expected to finish after it.
+    lag = percentile([j["end_to_end_s"] for j in journeys if j["outcome"] == "success"], 0.1) or 0.0
+    arrived = [j for j in journeys if j["outcome"] != "rejected_busy"
+               and step["start"] - lag <= j["submitted_at"] <= step["end"] - lag]
+    arrived_fpm = len(arrived) / duration * 60 if duration else 0.0
+    summary["stable"] = (summary["rejected_busy"] == 0 and summary["failed"] == 0
+                         and slope <= 0.02 and summary["succeeded"] > 0
+                         and summary["throughput_fpm"] >= 0.8 * arrived_fpm)
+    return summary
+
+def capacity_report(results, target_fpm, cores, worker_memory_mb):
+    """
+    Turns a load-test run into pool recommendations using Little's law:
+    busy slots = arrival rate x time each request holds a slot.
+    """
+    journeys, samples = results["journeys"], results["samples"]
+    steps = [summarize_step(s, journeys, samples) for s in results["steps"]]
+    ok = [j for j in journeys if j["outcome"] == "success"]
+    lines = ["# Capacity report", ""]
+
+    lines += ["## Measured steps", "",
+              "| files/min offered | done/min | ok | 503 | failed | max backlog | backlog/s "
+              "| queue wait p95 | processing p50/p95 | end-to-end p95 | worker CPU% | stable |",
+              "| --- | --- | --- | --- | --- | --- | --- | --- | --- | --- | --- | --- |"]
+    for s in steps:
+        lines.append(
+            f"| {s['rate_fpm']:g} | {s['throughput_fpm']:.1f} | {s['succeeded']} | {s['rejected_busy']} "
+            f"| {s['failed']} | {s['max_backlog'] if s['max_backlog'] is not None else '-'} "
+            f"| {s['backlog_slope_per_s']:+.3f} | {fmt(s['queue_wait_s']['p95'])} "
+            f"| {fmt(s['processing_s']['p50'])} / {fmt(s['processing_s']['p95'])} "
+            f"| {fmt(s['end_to_end_s']['p95'])} | {fmt(s['worker_cpu_percent'], '%')} "
+            f"| {'yes' if s['stable'] else 'NO'} |")
+    lines.append("")
+
+    if not ok:
+        if journeys and all(j["outcome"].startswith("client_error") for j in journeys):
+            lines.append(f"Every request failed to connect to {results['config']['base_url']} "
+                         f"({journeys[0]['outcome']}). Check the stack is up and --base-url "
+                         f"matches the port gunicorn binds.")
+        else:
+            lines.append("No file completed successfully, so there is nothing to model. "
+                         "Check that the stack is running with LLM_STUB=1.")
+        return "\n".join(lines), steps
+
+    stable = [s for s in steps if s["stable"]]
+    sustained = max((s["throughput_fpm"] for s in stable), default=0.0)
+    arrival = target_fpm / 60.0
+
+    # Service times from the least loaded runs, so queueing doesn't inflate them
+    calm = [j for j in ok if j["step"] in {s["rate_fpm"] for s in stable}] or ok
+    proc_mean = mean([j["processing_s"] for j in calm])
+
+    # Worker CPU seconds per task: integrate sampled CPU% over the run
+    cpu_seconds = 0.0
+    for prev, cur in zip(samples, samples[1:]):
+        cpu_seconds += cur["worker"]["cpu_percent"] / 100.0 * (cur["t"] - prev["t"])
+    sampled_cpu = any(s["worker"]["processes"] for s in samples)
+    cpu_per_task = cpu_seconds / len(ok) if sampled_cpu else None
+    cpu_ratio = cpu_per_task / proc_mean if cpu_per_task and proc_mean else None
+
+    worker_samples = [s["worker"] for s in samples if s["worker"]["processes"]]
+    worker_rss = [w["rss_mb"] for w in worker_samples]
+    rss_total = max(worker_rss) if worker_rss else None
+    rss_per_proc = max(w["rss_mb"] / w["processes"] for w in worker_samples) if worker_samples else None
+    # Runs saved before USS was sampled only have RSS
+    uss_per_proc = max((w.get("uss_mb", w["rss_mb"]) / w["processes"] for w in worker_samples), default=None)
+    rss_growth = (worker_rss[-1] - worker_rss[0]) / worker_rss[0] if len(worker_rss) > 1 and worker_rss[0] else 0.0
+
+    # --- Celery ---
+    slots = max(1, math.ceil(arrival * proc_mean / TARGET_UTILIZATION))
+    cpu_bound = cpu_ratio is not None and cpu_ratio >= 0.3
+    pool = "prefork" if cpu_bound or cpu_ratio is None else "threads"
+    nodes = 1
+    if cpu_per_task:
+        nodes = max(nodes, math.ceil(arrival * cpu_per_task / TARGET_UTILIZATION / cores))
+    memory_note = None
+    if rss_total and pool == "threads":
+        # One process per node whatever the concurrency: its whole RSS is the footprint
+        if rss_total > worker_memory_mb:
+            memory_note = (f"- The worker measured {rss_total:.0f} MB, above the {worker_memory_mb} MB "
+                           f"budget per node, even with a single process.")
+    elif uss_per_proc:
+        # Prefork: one full copy of the shared (copy-on-write) pages per node,
+        # plus each child's unique pages
+        spare = worker_memory_mb - rss_per_proc
+        if spare <= uss_per_proc:
+            memory_note = (f"- One worker process needs {rss_per_proc:.0f} MB; the {worker_memory_mb} MB "
+                           f"budget per node leaves almost no room for children.")
+        else:
+            nodes = max(nodes, math.ceil(slots * uss_per_proc / spare))
+    concurrency = math.ceil(slots / nodes)
+    prefetch = 1 if proc_mean > 1.0 else 4
+
+    lines += ["## Model inputs", "",
+              f"- Target: {target_fpm:g} files/min ({arrival:.2f}/s); "
+              f"highest stable measured throughput: {sustained:.1f} files/min",
+              f"- Task processing time (mean, stable steps): {fmt(proc_mean)} "
+              f"(worker timestamps for {sum(1 for j in ok if j.get('timing_source') == 'worker')}"
+              f"/{len(ok)} files, the rest from polling)",
+              f"- Worker CPU per task: {fmt(cpu_per_task)}"
+              + (f" ({cpu_ratio:.0%} of processing time is CPU)" if cpu_ratio is not None else ""),
+              f"- Worker memory: {fmt(rss_total, ' MB')} total RSS; per process {fmt(rss_per_proc, ' MB')} RSS, "
+              f"{fmt(uss_per_proc, ' MB')} unique (USS); growth over run: {rss_growth:+.0%}",
+              f"- Cores per node: {cores}; worker memory budget per node: {worker_memory_mb} MB", ""]
+
+    if target_fpm > sustained:
+        lines += [f"**Warning:** the target is above the highest stable measured throughput "
+                  f"({sustained:.1f} files/min), so this recommendation is extrapolated. "
+                  f"Re-run with --rates reaching the target to confirm it.", ""]
+
+    lines += ["## Celery recommendation", "",
+              f"- {slots} concurrent task slots needed ({arrival:.2f}/s x {proc_mean:.2f}s / {TARGET_UTILIZATION:.0%})",
+              f"- {nodes} worker node(s) with `--pool={pool} --concurrency={concurrency} "
+              f"--prefetch-multiplier={prefetch}`"]
+    if pool == "threads":
+        lines.append("- Tasks mostly wait on the LLM, so threads give the same throughput as "
+                     "prefork for a fraction of the memory.")
+    elif cpu_bound:
+        lines.append("- Text extraction dominates task time, so keep separate processes (prefork) "
+                     "to avoid GIL contention.")
+    else:
+        lines.append("- Worker CPU was not sampled (install psutil), so prefork is the safe default.")
+    if memory_note:
+        lines.append(memory_note)
+    if prefetch == 1:
+        lines.append("- Tasks run for seconds; prefetch 1 stops one worker hoarding a backlog.")
+    if rss_growth > 0.2:
+        lines.append("- Worker memory grew >20% during the run; add `--max-tasks-per-child=100`.")
+    lines += ["", "```", f"CELERY_POOL={pool} CELERY_CONCURRENCY={concurrency} "
+              f"CELERY_PREFETCH={prefetch} ./start.sh", "```", ""]
+
+    # --- Gunicorn ---
+    # The browser polls every CLIENT_POLL_SECONDS for the whole end-to-end time
+    e2e = mean([j["end_to_end_s"] for j in calm])
+    status_calls = max(1.0, e2e / CLIENT_POLL_SECONDS)
+    web_seconds_per_file = (
+        mean([j["upload_s"] for j in calm])
+        + status_calls * (mean([x for j in calm for x in j["status_s"]]) or 0.0)
+        + (mean([j["match_s"] for j in calm]) or 0.0)
+        + (mean([j["csv_s"] for j in calm]) or 0.0)
+    )
+    web_slots = max(1, math.ceil(arrival * web_seconds_per_file / TARGET_UTILIZATION))
+    threads = 4
+    web_workers = max(2, math.ceil(web_slots / threads))
+    max_workers = 2 * cores + 1
+
+    lines += ["## Gunicorn recommendation", "",
+              f"- ~{2 + status_calls:.0f} requests per file ({status_calls:.0f} status polls at "
+              f"{CLIENT_POLL_SECONDS:g}s); {web_seconds_per_file * 1000:.0f} ms of request time per file",
+              f"- {web_slots} concurrent request slots needed -> {web_workers} worker(s) x {threads} threads (gthread)"]
+    if web_workers > max_workers:
+        lines.append(f"- That is more than 2 x cores + 1 = {max_workers}; run several web nodes "
+                     f"behind a load balancer instead.")
+    lines += ["", "```",
+              f"WEB_CONCURRENCY={min(web_workers, max_workers)} "
+              f"GUNICORN_CMD_ARGS=\"--worker-class gthread --threads {threads} --timeout 60\" ./start.sh",
+              "```", ""]
+
+    # --- Redis ---
+    redis_samples = [s["redis_used_mb"] for s in samples if "redis_used_mb" in s]
+    if len(redis_samples) > 1:
+        per_task_kb = max(0.0, redis_samples[-1] - redis_samples[0]) * 1024 / len(ok)
+        day_mb = per_task_kb * arrival * 86400 / 1024
+        lines += ["## Redis", "",
+                  f"- Memory {redis_samples[0]:.1f} -> {redis_samples[-1]:.1f} MB "
+                  f"(~{per_task_kb:.1f} KB per stored result)",
+                  f"- At the target rate, results kept for Celery's default 1 day need ~{day_mb:.0f} MB"]
+        if day_mb > 256:
+            lines.append("- Lower `result_expires` in tasks.py (results are only read while the UI polls).")
+        lines.append("")
+
+    return "\n".join(lines), steps
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test and capacity model for the CV extractor.")
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--rates', default='10,30,60',
+                        type=lambda s: [float(x) for x in s.split(',') if x],
+                        help="Comma separated arrival rates in files/min, run as consecutive steps")
+    parser.add_argument('--step-duration', type=float, default=120, help="Seconds per rate step")
+    parser.add_argument('--files', help="Directory of resumes to upload (default: generated PDF)")
+    parser.add_argument('--poll-interval', type=float, default=0.5, help="Harness /status poll interval")
+    parser.add_argument('--sample-interval', type=float, default=2.0)
+    parser.add_argument('--task-timeout', type=float, default=300)
+    parser.add_argument('--target', type=float, default=60, help="Target files/min to size for")
+    parser.add_argument('--cores', type=int, default=os.cpu_count() or 1, help="Cores per production node")
+    parser.add_argument('--worker-memory-mb', type=int, default=512,
+                        help="RAM per node available to Celery workers")
+    parser.add_argument('--out', default='loadtest_results.json')
+    parser.add_argument('--report', default='capacity_report.md')
+    parser.add_argument('--report-only', metavar='RESULTS_JSON',
+                        help="Skip the load and model a saved results file")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.report_only:
+        with open(args.report_only) as f:
+            results = json.load(f)
+    else:
+        results = run_load(args)
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Raw samples and timings written to {args.out}")
+
+    report, _ = capacity_report(results, args.target, args.cores, args.worker_memory_mb)
+    with open(args.report, 'w') as f:
+        f.write(report)
+    print(report)
+    print(f"📊 Capacity report written to {args.report}")
@@ -0,0 +1,183 @@
+import os
+import re
+import zipfile
+from PIL import Image
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdfdocument import PDFDocument, PDFPasswordIncorrect
+from pdfminer.pdftypes import resolve1
+
+# Limits for the pre-dispatch check. Everything here only reads headers,
+# the PDF catalog, the zip directory and two size-capped DOCX parts, so it
+# runs in bounded time inside the web request.
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', 10 * 1024 * 1024))
+MAX_PDF_PAGES = int(os.environ.get('MAX_PDF_PAGES', 30))
+MAX_DOCX_UNCOMPRESSED_BYTES = int(os.environ.get('MAX_DOCX_UNCOMPRESSED_BYTES', 20 * 1024 * 1024))
+# Cap on each DOCX part actually decompressed in the request (document.xml is
+# a few hundred KB even for long resumes)
+MAX_DOCX_PART_BYTES = int(os.environ.get('MAX_DOCX_PART_BYTES', 4 * 1024 * 1024))
+MIN_IMAGE_SIDE = int(os.environ.get('MIN_IMAGE_SIDE', 200))
+MAX_IMAGE_PIXELS = int(os.environ.get('MAX_IMAGE_PIXELS', 40_000_000))
+
+# Extension -> format we expect the magic bytes to report
+EXTENSION_FORMATS = {
+    '.pdf': 'pdf',
+    '.docx': 'docx',
+    '.jpg': 'jpeg',
+    '.jpeg': 'jpeg',
+    '.png': 'png',
+}
+
+def sniff_format(header):
+    """
+    Identifies the real file type from its leading bytes.
+    """
+    # The PDF spec allows junk before the marker within the first 1 KB
+    if b'%PDF-' in header[:1024]:
+        return 'pdf'
+    if header.startswith(b'PK\x03\x04'):
+        return 'docx'
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    return None
+
+def check_pdf(stream):
+    """
+    Reads the page count from the catalog without parsing any page
+    content and refuses password-protected files.
+    """
+    try:
+        doc = PDFDocument(PDFParser(stream), password='')
+    except PDFPasswordIncorrect:
+        return None, "PDF is password protected."
+    except Exception as e:
+        return None, f"Corrupt PDF: {e}"
+
+    try:
+        pages = int(resolve1(doc.catalog['Pages'])['Count'])
+    except Exception:
+        return None, "Corrupt PDF: missing page tree."
+
+    if pages < 1:
+        return None, "PDF has no pages."
+    if pages > MAX_PDF_PAGES:
+        return None, f"PDF has {pages} pages (limit is {MAX_PDF_PAGES})."
+    return {"pages": pages}, None
+
+def _read_member_bounded(zf, name, limit):
+    """
+    Decompresses one zip member, stopping after `limit` bytes.
+    Reading to the end makes zipfile verify the member's CRC.
+    """
+    size = 0
+    with zf.open(name) as member:
+        while True:
+            chunk = member.read(64 * 1024)
+            if not chunk:
+                return size
+            size += len(chunk)
+            if size > limit:
+                return None
+
+def check_docx(stream):
+    """
+    Checks the zip directory, CRC-checks only the parts Word needs
+    ([Content_Types].xml and word/document.xml, each capped at
+    MAX_DOCX_PART_BYTES) and reads the page count Word stores in
+    docProps/app.xml when available.
+    """
+    try:
+        with zipfile.ZipFile(stream) as zf:
+            names = set(zf.namelist())
+            if 'word/document.xml' not in names or '[Content_Types].xml' not in names:
+                return None, "Not a Word document (required parts missing)."
+
+            # Declared sizes cost nothing to check and catch most zip bombs
+            uncompressed = sum(info.file_size for info in zf.infolist())
+            if uncompressed > MAX_DOCX_UNCOMPRESSED_BYTES:
+                return None, "DOCX expands beyond the allowed size."
+
+            for name in ('[Content_Types].xml', 'word/document.xml'):
+                if _read_member_bounded(zf, name, MAX_DOCX_PART_BYTES) is None:
+                    return None, f"DOCX part {name} is too large."
+
+            pages = None
+            if 'docProps/app.xml' in names and zf.getinfo('docProps/app.xml').file_size < 64 * 1024:
+                match = re.search(rb'<Pages>(\d+)</Pages>', zf.read('docProps/app.xml'))
+                if match:
+                    pages = int(match.group(1))
+    except zipfile.BadZipFile as e:
+        return None, f"Corrupt DOCX: {e}"
+    except Exception as e:
+        return None, f"Unreadable DOCX: {e}"
+
+    return {"pages": pages}, None
+
+def check_image(stream):
+    """
+    Reads dimensions from the header, then runs PIL's integrity check.
+    """
+    try:
+        with Image.open(stream) as img:
+            width, height = img.size
+            if width * height > MAX_IMAGE_PIXELS:
+                return None, f"Image is too large ({width}x{height})."
+            if min(width, height) < MIN_IMAGE_SIDE:
+                return None, f"Image is too small to read ({width}x{height})."
+            img.verify()
+    except Exception as e:
+        return None, f"Corrupt image: {e}"
+
+    return {"pages": 1, "width": width, "height": height}, None
+
+CHECKS = {
+    'pdf': check_pdf,
+    'docx': check_docx,
+    'jpeg': check_image,
+    'png': check_image,
+}
+
+def validate_upload(stream, filename):
+    """
+    Lightweight pre-dispatch validation for an uploaded file.
+
+    Args:
+        stream: Seekable binary file object (e.g. FileStorage.stream).
+        filename (str): Original file name, used for the extension.
+
+    Returns:
+        (info, error): info is a dict with format, size_bytes and pages
+        (plus width/height for images) when the file is acceptable,
+        otherwise error is a human readable reason.
+    """
+    _, file_extension = os.path.splitext(filename or '')
+    expected = EXTENSION_FORMATS.get(file_extension.lower())
+    if not expected:
+        return None, "Unsupported File Format. Please use PDF, DOCX, or JPG/PNG."
+
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+
+    if size == 0:
+        return None, "File is empty."
+    if size > MAX_UPLOAD_BYTES:
+        return None, f"File is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB."
+
+    actual = sniff_format(stream.read(1024))
+    stream.seek(0)
+    if actual != expected:
+        return None, f"File content does not match its {file_extension} extension."
+
+    try:
+        details, error = CHECKS[actual](stream)
+    finally:
+        # Leave the stream ready for the caller to save
+        stream.seek(0)
+    if error:
+        return None, error
+
+    info = {"format": actual, "size_bytes": size}
+    info.update(details)
+    return info, None
@@ -43,7 +43,7 @@ if __name__ == "__main__":
 
     # 2. Start Celery Worker
     # Note: We activate the venv python explicitly if needed, but assuming you run this FROM venv
-    run_command("celery -A tasks.celery_app worker --loglevel=info -n worker1@%h", "Celery Worker")
+    run_command("celery -A tasks.celery_app worker --beat --loglevel=info -n worker1@%h", "Celery Worker")
 
     # 3. Start Flask App
     run_command("python3 app.py", "Flask API")
@@ -0,0 +1,299 @@
+import os
+import re
+import time
+import uuid
+import shutil
+import redis
+from werkzeug.utils import secure_filename
+
+# Upload spool: every batch of resumes gets its own subdirectory under
+# SPOOL_ROOT. Batch ids are issued by the server and registered in Redis,
+# together with the set of task ids that still need the batch's files
+# (its reference count). /upload adds a reference before dispatching a
+# task and the task drops it in its `finally`. The janitor only evicts
+# batches with no live references, after pruning references whose tasks
+# are gone from the broker and result backend (killed workers, lost tasks).
+SPOOL_ROOT = os.environ.get('SPOOL_ROOT', 'uploads')
+REDIS_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+
+# Total bytes the spool may hold (default 512 MB)
+SPOOL_QUOTA_BYTES = int(os.environ.get('SPOOL_QUOTA_BYTES', 512 * 1024 * 1024))
+
+# /upload starts answering 503 once usage crosses this fraction of the quota
+SPOOL_HIGH_WATERMARK = float(os.environ.get('SPOOL_HIGH_WATERMARK', 0.9))
+
+# When over quota the janitor evicts unreferenced batches down to this fraction
+SPOOL_LOW_WATERMARK = float(os.environ.get('SPOOL_LOW_WATERMARK', 0.75))
+
+# A task STARTED longer ago than this is assumed to have died with its
+# worker (default 1 hour). Measured from the task's own start time.
+SPOOL_MAX_AGE_SECONDS = int(os.environ.get('SPOOL_MAX_AGE_SECONDS', 3600))
+
+# Grace period covering the gap between taking a reference, saving the file
+# and the task reaching the broker: the janitor never prunes a reference
+# younger than this, nor evicts an unreferenced batch touched more recently
+SPOOL_MIN_AGE_SECONDS = int(os.environ.get('SPOOL_MIN_AGE_SECONDS', 120))
+
+# How long an issued batch id stays valid after its last upload (default 1 day)
+SPOOL_BATCH_TTL_SECONDS = int(os.environ.get('SPOOL_BATCH_TTL_SECONDS', 86400))
+
+# Seconds a client is told to wait when the spool is full
+SPOOL_RETRY_AFTER = int(os.environ.get('SPOOL_RETRY_AFTER', 30))
+
+BATCH_ID_PATTERN = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-4[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}$')
+
+USAGE_KEY = 'spool:usage_bytes'
+
+os.makedirs(SPOOL_ROOT, exist_ok=True)
+
+_redis = None
+
+def get_redis():
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+    return _redis
+
+def _batch_key(batch_id):
+    return f'spool:batch:{batch_id}'
+
+def _refs_key(batch_id):
+    return f'spool:batch:{batch_id}:tasks'
+
+
+# --- BATCHES & REFERENCES ---
+
+def is_batch_id(batch_id):
+    return isinstance(batch_id, str) and bool(BATCH_ID_PATTERN.match(batch_id))
+
+def resolve_batch(batch_id=None):
+    """
+    Returns batch_id if the server issued it and it has not expired,
+    otherwise issues a new one. Clients can never pick their own id.
+    """
+    r = get_redis()
+    if is_batch_id(batch_id) and r.exists(_batch_key(batch_id)):
+        r.expire(_batch_key(batch_id), SPOOL_BATCH_TTL_SECONDS)
+        return batch_id
+
+    batch_id = str(uuid.uuid4())
+    r.hset(_batch_key(batch_id), 'created', time.time())
+    r.expire(_batch_key(batch_id), SPOOL_BATCH_TTL_SECONDS)
+    return batch_id
+
+def add_ref(batch_id, task_id):
+    # Sorted set scored by when the reference was taken, so the janitor can
+    # tell references older than its broker snapshot from brand new ones
+    get_redis().zadd(_refs_key(batch_id), {task_id: time.time()})
+
+def drop_ref(batch_id, task_id):
+    get_redis().zrem(_refs_key(batch_id), task_id)
+
+def live_refs(batch_id):
+    return set(get_redis().zrange(_refs_key(batch_id), 0, -1))
+
+def refs_added_before(batch_id, cutoff):
+    return set(get_redis().zrangebyscore(_refs_key(batch_id), '-inf', cutoff))
+
+def batch_dir(batch_id):
+    return os.path.join(SPOOL_ROOT, batch_id)
+
+def batch_of(file_path):
+    return os.path.basename(os.path.dirname(file_path))
+
+
+# --- FILES ---
+
+def acquire(file_storage, batch_id):
+    """
+    Saves an uploaded file into its batch directory and returns the path.
+    Call add_ref() first so the janitor never sees the file unreferenced.
+    """
+    original = file_storage.filename or ''
+    _, ext = os.path.splitext(original)
+    safe_name = secure_filename(original) or "upload"
+    if ext and not safe_name.lower().endswith(ext.lower()):
+        safe_name += ext.lower()
+
+    target_dir = batch_dir(batch_id)
+    filepath = os.path.join(target_dir, str(uuid.uuid4()) + "_" + safe_name)
+
+    # A concurrent release() may drop the directory between makedirs and
+    # save when the batch's last task finishes, so retry once.
+    for attempt in range(2):
+        os.makedirs(target_dir, exist_ok=True)
+        try:
+            file_storage.save(filepath)
+            break
+        except FileNotFoundError:
+            if attempt:
+                raise
+
+    get_redis().incrby(USAGE_KEY, os.path.getsize(filepath))
+    return filepath
+
+def release(file_path, task_id=None):
+    """
+    Drops a task's reference: deletes its file, removes the batch
+    directory once it is empty and drops task_id from the batch's refs.
+    """
+    try:
+        size = os.path.getsize(file_path)
+        os.remove(file_path)
+        get_redis().decrby(USAGE_KEY, size)
+    except FileNotFoundError:
+        pass
+
+    if task_id:
+        drop_ref(batch_of(file_path), task_id)
+
+    parent = os.path.dirname(file_path)
+    if os.path.abspath(parent) == os.path.abspath(SPOOL_ROOT):
+        return
+    try:
+        os.rmdir(parent)  # Only succeeds when the batch is empty
+    except OSError:
+        pass
+
+def remove_batch(batch_id):
+    """
+    Deletes a whole batch on behalf of its owner. Refuses (returns False)
+    while any task still holds a reference to it.
+    """
+    if not is_batch_id(batch_id):
+        return False
+    if live_refs(batch_id):
+        return False
+    _evict(batch_dir(batch_id), _dir_size(batch_dir(batch_id)))
+    get_redis().delete(_batch_key(batch_id))
+    return True
+
+
+# --- USAGE & JANITOR ---
+
+def _dir_size(path):
+    size = 0
+    try:
+        for child in os.scandir(path):
+            try:
+                size += child.stat(follow_symlinks=False).st_size
+            except FileNotFoundError:
+                continue
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    return size
+
+def _scan_batches():
+    """
+    Returns a list of (batch_path, size_bytes, last_modified) for every
+    batch in the spool. Loose files from older releases count as their
+    own one-file batch so they get evicted too.
+    """
+    batches = []
+    try:
+        entries = list(os.scandir(SPOOL_ROOT))
+    except FileNotFoundError:
+        return batches
+
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                size, newest = 0, entry.stat().st_mtime
+                for child in os.scandir(entry.path):
+                    st = child.stat(follow_symlinks=False)
+                    size += st.st_size
+                    newest = max(newest, st.st_mtime)
+                batches.append((entry.path, size, newest))
+            elif entry.is_file(follow_symlinks=False):
+                st = entry.stat()
+                batches.append((entry.path, st.st_size, st.st_mtime))
+        except FileNotFoundError:
+            # Released while we were looking at it
+            continue
+    return batches
+
+def usage_bytes():
+    """
+    Running total kept by acquire/release/sweep. O(1), safe per request;
+    only the janitor walks the disk to correct drift.
+    """
+    return max(0, int(get_redis().get(USAGE_KEY) or 0))
+
+def is_under_pressure():
+    """
+    True when the spool is too full to accept more uploads.
+    """
+    return usage_bytes() >= SPOOL_QUOTA_BYTES * SPOOL_HIGH_WATERMARK
+
+def _evict(path, size):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+    get_redis().decrby(USAGE_KEY, size)
+
+def sweep(live_tasks=None, snapshot_at=None, now=None, enforce_quota=True):
+    """
+    Janitor pass over the spool:
+    1. References: drops task ids that live_tasks(task_ids) reports as gone
+       (finished without releasing, lost from the broker, or stuck in a
+       dead worker). Only references taken at least SPOOL_MIN_AGE_SECONDS
+       before snapshot_at (when the caller looked at the broker) are
+       checked, so a task queued after the snapshot is never judged by it.
+       Without live_tasks references are trusted.
+    2. Age: evicts unreferenced batches idle longer than SPOOL_MIN_AGE_SECONDS.
+    3. Quota: if still above the high watermark, evicts the remaining
+       unreferenced batches, oldest first, down to the low watermark.
+    Batches with live references are never evicted; /upload's 503
+    backpressure is what protects the disk from those.
+    Returns a small report dict for logging.
+    """
+    now = now or time.time()
+    snapshot_at = snapshot_at or now
+    report = {"evicted_age": 0, "evicted_quota": 0, "pruned_refs": 0, "freed_bytes": 0}
+
+    kept, unreferenced = [], []
+    for path, size, mtime in _scan_batches():
+        idle = now - mtime
+        batch_id = os.path.basename(path)
+        refs = live_refs(batch_id) if is_batch_id(batch_id) else set()
+
+        if refs and live_tasks:
+            candidates = refs_added_before(batch_id, snapshot_at - SPOOL_MIN_AGE_SECONDS)
+            if candidates:
+                dead = candidates - set(live_tasks(list(candidates)))
+                for task_id in dead:
+                    drop_ref(batch_id, task_id)
+                report["pruned_refs"] += len(dead)
+                # Re-read: refs may have been added while we were checking
+                refs = live_refs(batch_id)
+
+        if refs:
+            kept.append(size)
+        elif idle > SPOOL_MIN_AGE_SECONDS:
+            _evict(path, size)
+            report["evicted_age"] += 1
+            report["freed_bytes"] += size
+        else:
+            unreferenced.append((path, size, mtime))
+
+    usage = sum(kept) + sum(size for _, size, _ in unreferenced)
+    if enforce_quota and usage >= SPOOL_QUOTA_BYTES * SPOOL_HIGH_WATERMARK:
+        target = SPOOL_QUOTA_BYTES * SPOOL_LOW_WATERMARK
+        for path, size, mtime in sorted(unreferenced, key=lambda b: b[2]):
+            if usage < target:
+                break
+            if live_refs(os.path.basename(path)):
+                continue  # An upload landed since the scan
+            _evict(path, size)
+            usage -= size
+            report["evicted_quota"] += 1
+            report["freed_bytes"] += size
+
+    # Full recount corrects any drift in the running total
+    get_redis().set(USAGE_KEY, usage)
+    report["usage_bytes"] = usage
+    return report
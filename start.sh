@@ -1,9 +1,17 @@
-#!/bin/bash
-
-# 1. Start Celery in the background (&)
-# We use --concurrency=2 to save RAM on the free tier
-celery -A tasks.celery_app worker --loglevel=info --concurrency=2 &
-
-# 2. Start Gunicorn in the foreground
-# This keeps the container alive and listening on the port
-gunicorn app:app
\ No newline at end of file
+#!/bin/bash
+
+# Pool sizing can be overridden per deployment (see loadtest.py's capacity report).
+# Gunicorn reads WEB_CONCURRENCY and GUNICORN_CMD_ARGS (e.g. "--threads 4") itself.
+CELERY_CONCURRENCY=${CELERY_CONCURRENCY:-2}
+CELERY_POOL=${CELERY_POOL:-prefork}
+CELERY_PREFETCH=${CELERY_PREFETCH:-4}
+
+# 1. Start Celery in the background (&)
+# We use --concurrency=2 by default to save RAM on the free tier
+# --beat runs the periodic spool janitor in the same process
+celery -A tasks.celery_app worker --beat --loglevel=info --concurrency=$CELERY_CONCURRENCY --pool=$CELERY_POOL --prefetch-multiplier=$CELERY_PREFETCH &
+
+# 2. Start Gunicorn in the foreground
+# This keeps the container alive and listening on the port
+# (5000 by default, the same port run.py and loadtest.py use)
+gunicorn app:app --bind 0.0.0.0:${PORT:-5000}
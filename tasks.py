@@ -1,4 +1,6 @@
 import os
+import json
+import time
 from dotenv import load_dotenv
 
 # Force load .env so Celery workers always have the key
@@ -6,6 +8,7 @@ load_dotenv()
 
 from celery import Celery
 from processing.router import handle_upload
+import spool
 
 # Configure Celery to use Redis
 # 'app' is the name of our Flask app (which we'll link later)
@@ -13,28 +16,121 @@ redis_url = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 
 celery_app = Celery('cv_extractor', broker=redis_url, backend=redis_url)
 
+# Report STARTED while a task runs, so /status separates queue wait from processing
+celery_app.conf.task_track_started = True
+
+# Periodic janitor: run the worker with --beat (or a separate `celery beat`)
+SPOOL_JANITOR_INTERVAL = int(os.environ.get('SPOOL_JANITOR_INTERVAL', 300))
+
+celery_app.conf.beat_schedule = {
+    'spool-janitor': {
+        'task': 'tasks.spool_janitor_task',
+        'schedule': float(SPOOL_JANITOR_INTERVAL),
+    },
+}
+
 @celery_app.task(bind=True)
-def process_file_task(self, file_path):
+def process_file_task(self, file_path, file_info=None):
     """
     Background Task:
-    1. Receives file path.
+    1. Receives file path (and the format/size/pages measured by /upload).
     2. Runs the heavy extraction logic.
     3. Returns the result (stored in Redis).
     """
+    started_at = time.time()
+    # Record the start time with the STARTED state, so the janitor judges
+    # "worker died" from when the task started, not when the file was uploaded
+    self.update_state(state='STARTED', meta={"started_at": started_at})
     try:
         # Check if file exists before processing
         if not os.path.exists(file_path):
             return {"error": "File not found"}
 
+        if file_info:
+            print(f"📄 Processing {file_info.get('format')}: "
+                  f"{file_info.get('size_bytes')} bytes, {file_info.get('pages')} page(s)")
+
         # --- RUN THE CORE LOGIC ---
         result = handle_upload(file_path)
         
-        # Cleanup: Delete the temp file now that we are done
-        # (We do it here, not in app.py, because app.py finishes immediately)
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            
+        # Echo what /upload measured so /status and the load-test capacity
+        # model can relate task cost to format, size and page count
+        if file_info and isinstance(result, dict):
+            result["file_info"] = file_info
+        
+        # Worker-side timestamps: queue wait and service time measured here
+        # don't depend on how often a client polls /status
+        if isinstance(result, dict):
+            result["timings"] = {"started_at": started_at, "finished_at": time.time()}
         return result
         
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+    finally:
+        # Cleanup: Release the spool reference whatever happened
+        # (We do it here, not in app.py, because app.py finishes immediately)
+        spool.release(file_path, task_id=self.request.id)
+
+def task_ids_in_broker():
+    """
+    Ids of tasks still waiting in the Redis queue or reserved (unacked)
+    by a worker. Only the janitor calls this, it reads whole queues.
+    """
+    r = spool.get_redis()
+    queue = celery_app.conf.task_default_queue or 'celery'
+    messages = r.lrange(queue, 0, -1)
+    # Unacked entries are [message, exchange, routing_key]
+    messages += [json.loads(v)[0] for v in r.hvals('unacked')]
+
+    ids = set()
+    for message in messages:
+        try:
+            if isinstance(message, str):
+                message = json.loads(message)
+            ids.add(message['headers']['id'])
+        except (ValueError, KeyError, TypeError):
+            continue
+    return ids
+
+def live_tasks(task_ids, queued):
+    """
+    Subset of task_ids that may still use their spool file: queued or
+    reserved in the broker, or STARTED less than SPOOL_MAX_AGE_SECONDS
+    ago (older than that, its worker must have died).
+    """
+    now = time.time()
+    live = []
+    for task_id in task_ids:
+        if task_id in queued:
+            live.append(task_id)
+            continue
+        result = celery_app.AsyncResult(task_id)
+        if result.state != 'STARTED':
+            continue
+        meta = result.info if isinstance(result.info, dict) else {}
+        # No started_at yet: Celery's own STARTED update landed but ours
+        # hasn't, so the task began moments ago
+        started_at = meta.get("started_at", now)
+        if now - started_at < spool.SPOOL_MAX_AGE_SECONDS:
+            live.append(task_id)
+    return live
+
+@celery_app.task
+def spool_janitor_task():
+    """
+    Periodic Task:
+    Drops references held by tasks that are gone, then evicts
+    unreferenced batches (age) and, when the spool is over quota,
+    the oldest unreferenced ones. Catches files left behind by killed
+    workers or tasks that were never consumed.
+    """
+    # One broker snapshot per pass; sweep only judges references taken
+    # well before it
+    snapshot_at = time.time()
+    queued = task_ids_in_broker()
+    report = spool.sweep(live_tasks=lambda ids: live_tasks(ids, queued),
+                         snapshot_at=snapshot_at)
+    if report["evicted_age"] or report["evicted_quota"] or report["pruned_refs"]:
+        print(f"🧹 Spool janitor: {report}")
+    return report
@@ -0,0 +1,195 @@
+import os
+import time
+
+import pytest
+
+import spool
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the handful of Redis commands spool uses.
+    """
+    def __init__(self):
+        self.data = {}
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def expire(self, key, seconds):
+        return key in self.data
+
+    def hset(self, key, field, value):
+        self.data.setdefault(key, {})[field] = str(value)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+
+    def zrem(self, key, member):
+        members = self.data.get(key, {})
+        members.pop(member, None)
+        if not members:
+            self.data.pop(key, None)
+
+    def zrange(self, key, start, end):
+        members = self.data.get(key, {})
+        return sorted(members, key=members.get)
+
+    def zrangebyscore(self, key, low, high):
+        members = self.data.get(key, {})
+        return [m for m in self.zrange(key, 0, -1) if members[m] <= float(high)]
+
+    def get(self, key):
+        value = self.data.get(key)
+        return None if value is None else str(value)
+
+    def set(self, key, value):
+        self.data[key] = int(value)
+
+    def incrby(self, key, amount):
+        self.data[key] = int(self.data.get(key, 0)) + amount
+
+    def decrby(self, key, amount):
+        self.incrby(key, -amount)
+
+
+class FakeUpload:
+    def __init__(self, filename, payload=b'x' * 100):
+        self.filename = filename
+        self.payload = payload
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.payload)
+
+
+@pytest.fixture(autouse=True)
+def isolated_spool(tmp_path, monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(spool, 'SPOOL_ROOT', str(tmp_path))
+    monkeypatch.setattr(spool, '_redis', fake)
+    return fake
+
+
+def upload(batch_id, task_id, name='cv.pdf'):
+    spool.add_ref(batch_id, task_id)
+    return spool.acquire(FakeUpload(name), batch_id)
+
+
+def age(path, seconds):
+    past = time.time() - seconds
+    for child in os.scandir(path):
+        os.utime(child.path, (past, past))
+    os.utime(path, (past, past))
+
+
+def test_batch_ids_are_issued_by_server():
+    issued = spool.resolve_batch()
+    assert spool.resolve_batch(issued) == issued
+    # Well-formed but never issued, and arbitrary client strings, get a new id
+    assert spool.resolve_batch('6f1c2c1e-1234-4abc-8def-0123456789ab') != '6f1c2c1e-1234-4abc-8def-0123456789ab'
+    assert spool.resolve_batch('a') != 'a'
+
+
+def test_acquire_and_release_track_refs_and_usage():
+    batch_id = spool.resolve_batch()
+    first = upload(batch_id, 't1', name='../../evil.pdf')
+    second = upload(batch_id, 't2')
+
+    assert os.path.dirname(first) == spool.batch_dir(batch_id)
+    assert os.path.basename(first).endswith('_evil.pdf')
+    assert spool.usage_bytes() == 200
+    assert spool.live_refs(batch_id) == {'t1', 't2'}
+
+    spool.release(first, task_id='t1')
+    assert spool.live_refs(batch_id) == {'t2'}
+    assert os.path.isdir(spool.batch_dir(batch_id))
+
+    spool.release(second, task_id='t2')
+    assert not spool.live_refs(batch_id)
+    assert not os.path.exists(spool.batch_dir(batch_id))
+    assert spool.usage_bytes() == 0
+
+
+def test_remove_batch_refuses_live_batches():
+    batch_id = spool.resolve_batch()
+    path = upload(batch_id, 't1')
+
+    assert spool.remove_batch(batch_id) is False
+    assert os.path.exists(path)
+
+    spool.drop_ref(batch_id, 't1')
+    assert spool.remove_batch(batch_id) is True
+    assert not os.path.exists(spool.batch_dir(batch_id))
+
+
+def test_sweep_never_evicts_referenced_batches(monkeypatch):
+    monkeypatch.setattr(spool, 'SPOOL_QUOTA_BYTES', 100)
+    live = spool.resolve_batch()
+    upload(live, 'queued')
+    age(spool.batch_dir(live), spool.SPOOL_MAX_AGE_SECONDS * 2)
+
+    report = spool.sweep(live_tasks=lambda ids: ids)
+
+    assert os.path.isdir(spool.batch_dir(live))
+    assert report["evicted_age"] == report["evicted_quota"] == 0
+    assert report["usage_bytes"] == 100
+
+
+def test_sweep_prunes_dead_refs_then_evicts():
+    dead = spool.resolve_batch()
+    upload(dead, 'lost')
+    age(spool.batch_dir(dead), spool.SPOOL_MIN_AGE_SECONDS + 10)
+
+    later = time.time() + spool.SPOOL_MIN_AGE_SECONDS + 10
+    report = spool.sweep(live_tasks=lambda ids: [], snapshot_at=later, now=later)
+
+    assert report["pruned_refs"] == 1
+    assert report["evicted_age"] == 1
+    assert not os.path.exists(spool.batch_dir(dead))
+    assert spool.usage_bytes() == 0
+
+
+def test_sweep_ignores_refs_newer_than_snapshot():
+    # The broker was read before this task was queued, so its absence
+    # from the snapshot proves nothing
+    batch_id = spool.resolve_batch()
+    snapshot_at = time.time()
+    upload(batch_id, 'just-queued')
+    age(spool.batch_dir(batch_id), spool.SPOOL_MIN_AGE_SECONDS + 10)
+
+    report = spool.sweep(live_tasks=lambda ids: pytest.fail(f"checked {ids}"), snapshot_at=snapshot_at)
+
+    assert report["pruned_refs"] == 0
+    assert spool.live_refs(batch_id) == {'just-queued'}
+    assert os.path.isdir(spool.batch_dir(batch_id))
+
+
+def test_sweep_quota_evicts_young_unreferenced_batches(monkeypatch):
+    monkeypatch.setattr(spool, 'SPOOL_QUOTA_BYTES', 250)
+    live = spool.resolve_batch()
+    upload(live, 't1')
+    orphan = spool.resolve_batch()
+    upload(orphan, 't2')
+    spool.drop_ref(orphan, 't2')
+    recent = spool.resolve_batch()
+    upload(recent, 't3')
+
+    report = spool.sweep()
+
+    assert report["evicted_age"] == 0
+    assert report["evicted_quota"] == 1
+    assert not os.path.exists(spool.batch_dir(orphan))
+    assert os.path.isdir(spool.batch_dir(live)) and os.path.isdir(spool.batch_dir(recent))
+
+
+def test_pressure_uses_running_total(monkeypatch):
+    monkeypatch.setattr(spool, 'SPOOL_QUOTA_BYTES', 100)
+    monkeypatch.setattr(spool, '_scan_batches', lambda: pytest.fail("walked the disk"))
+    assert not spool.is_under_pressure()
+
+    spool.get_redis().incrby(spool.USAGE_KEY, 95)
+    assert spool.is_under_pressure()
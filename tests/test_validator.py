@@ -0,0 +1,125 @@
+import io
+import zipfile
+
+from PIL import Image
+
+from processing import validator
+from processing.validator import validate_upload
+
+
+def make_pdf(pages=1, encrypt=None):
+    """
+    Hand-built PDF with `pages` empty pages; `encrypt` adds a Standard
+    security handler whose user password is not empty.
+    """
+    kids = " ".join(f"{3 + i} 0 R" for i in range(pages))
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>",
+               f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode()]
+    objects += [b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] >>"] * pages
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+    xref_at = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+
+    extra = ""
+    if encrypt:
+        key = "ab" * 32
+        extra = (f" /Encrypt << /Filter /Standard /V 1 /R 2 /O <{key}> /U <{key}> /P -4 >>"
+                 f" /ID [<{'01' * 16}> <{'01' * 16}>]")
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R{extra} >>\n"
+              f"startxref\n{xref_at}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def make_docx(document=b"<w:document/>", pages=2):
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', b"<Types/>")
+        zf.writestr('word/document.xml', document)
+        zf.writestr('docProps/app.xml', f"<Properties><Pages>{pages}</Pages></Properties>")
+    return out.getvalue()
+
+
+def make_png(width=800, height=600):
+    out = io.BytesIO()
+    Image.new('RGB', (width, height)).save(out, 'PNG')
+    return out.getvalue()
+
+
+def check(data, filename):
+    return validate_upload(io.BytesIO(data), filename)
+
+
+def test_valid_files_report_measurements():
+    assert check(make_pdf(pages=3), 'cv.pdf')[0]["pages"] == 3
+    assert check(make_docx(pages=2), 'cv.docx')[0] == {"format": "docx", "size_bytes": len(make_docx()), "pages": 2}
+    info, error = check(make_png(), 'cv.PNG')
+    assert error is None
+    assert (info["width"], info["height"], info["pages"]) == (800, 600, 1)
+
+
+def test_empty_file_is_rejected():
+    assert check(b"", 'cv.pdf') == (None, "File is empty.")
+
+
+def test_mislabelled_file_is_rejected():
+    info, error = check(make_png(), 'cv.pdf')
+    assert info is None and "does not match" in error
+    info, error = check(b"plain text resume", 'cv.docx')
+    assert info is None and "does not match" in error
+
+
+def test_unsupported_extension_is_rejected():
+    info, error = check(make_pdf(), 'cv.doc')
+    assert info is None and error.startswith("Unsupported File Format")
+
+
+def test_encrypted_pdf_is_rejected():
+    assert check(make_pdf(encrypt=True), 'cv.pdf') == (None, "PDF is password protected.")
+
+
+def test_page_limit(monkeypatch):
+    monkeypatch.setattr(validator, 'MAX_PDF_PAGES', 2)
+    info, error = check(make_pdf(pages=3), 'cv.pdf')
+    assert info is None and "limit is 2" in error
+
+
+def test_bad_zip_is_rejected():
+    data = make_docx()
+    info, error = check(data[:len(data) // 2], 'cv.docx')
+    assert info is None and error.startswith("Corrupt DOCX")
+
+
+def test_docx_crc_mismatch_is_rejected():
+    data = bytearray(make_docx(document=b"<w:document>" + b"x" * 500 + b"</w:document>"))
+    # Flip a byte inside the compressed document.xml payload
+    offset = data.index(b"word/document.xml") + len("word/document.xml") + 5
+    data[offset] ^= 0xFF
+    info, error = check(bytes(data), 'cv.docx')
+    assert info is None and "DOCX" in error
+
+
+def test_oversized_docx_part_is_rejected(monkeypatch):
+    monkeypatch.setattr(validator, 'MAX_DOCX_PART_BYTES', 1024)
+    info, error = check(make_docx(document=b"x" * 4096), 'cv.docx')
+    assert info is None and "too large" in error
+
+
+def test_tiny_and_truncated_images_are_rejected():
+    info, error = check(make_png(50, 50), 'cv.png')
+    assert info is None and "too small" in error
+    info, error = check(make_png()[:100], 'cv.png')
+    assert info is None and error.startswith("Corrupt image")
+
+
+def test_stream_is_rewound_for_saving():
+    stream = io.BytesIO(make_pdf())
+    validate_upload(stream, 'cv.pdf')
+    assert stream.tell() == 0